@@ -0,0 +1,80 @@
+import json
+from urllib import parse
+
+from lib.response import Response
+
+
+class Baseline:
+    fields = ('url', 'path', 'status', 'size', 'digest', 'redirect', 'etag', 'last_modified')
+
+    def __init__(self, records: list) -> None:
+        """
+        上一次扫描的结果，用来发起条件请求并对比出变化
+        @param records: Baseline.record 生成的结果列表
+        """
+        self.records = {record['url']: record for record in records}
+
+    @classmethod
+    def load(cls, path: str) -> 'Baseline':
+        with open(path) as baseline_file:
+            records = json.load(baseline_file)
+        if not isinstance(records, list):
+            raise ValueError('baseline must be a list of results')
+        for record in records:
+            if not isinstance(record, dict) or any(field not in record for field in cls.fields):
+                raise ValueError(f'incomplete baseline record: {record}')
+        return cls(records)
+
+    @staticmethod
+    def dump(records: list, path: str) -> None:
+        with open(path, 'w') as result_file:
+            json.dump(records, result_file, indent=2)
+
+    @staticmethod
+    def record(url: str, path: str, resp: Response) -> dict:
+        return {
+            'url': url,
+            'path': path,
+            'status': resp.status,
+            'size': resp.size,
+            'digest': resp.digest.hex(),
+            'redirect': resp.redirect,
+            'etag': resp.etag,
+            'last_modified': resp.last_modified,
+        }
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.records
+
+    def get(self, url: str) -> dict:
+        return self.records.get(url)
+
+    def conditional_headers(self, url: str) -> dict:
+        """已知结果带上 ETag/Last-Modified，内容没变的话服务器只需返回 304"""
+        record = self.records.get(url)
+        headers = {}
+        if record is None:
+            return headers
+        if record['etag']:
+            headers['If-None-Match'] = record['etag']
+        if record['last_modified']:
+            headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+    def compare(self, record: dict) -> str:
+        """
+        和上一次的结果对比
+        @return: 'new'、'changed'，没有变化时返回 None
+        """
+        old = self.records.get(record['url'])
+        if old is None:
+            return 'new'
+        for key in ('status', 'digest', 'redirect'):
+            if old[key] != record[key]:
+                return 'changed'
+        return None
+
+    def missing(self, target: str, urls) -> list:
+        """上一次在该目标上发现、这一次没有再出现的结果"""
+        root = parse.urljoin(target, '/')
+        return [record for url, record in self.records.items() if url.startswith(root) and url not in urls]
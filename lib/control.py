@@ -0,0 +1,106 @@
+import asyncio
+
+from lib.option import Option
+
+
+class ControlServer:
+    def __init__(self, controller) -> None:
+        """
+        本地控制通道，每行一条命令，可以在扫描过程中调整参数
+        @param controller: 当前的 Controller
+        """
+        self.controller = controller
+        self.server = None
+        self.commands = {
+            'help': self.help,
+            'status': self.status,
+            'pause': self.pause,
+            'resume': self.resume,
+            'limit': self.set_limit,
+            'rate': self.set_rate,
+            'include-status': self.set_include_status,
+            'exclude-status': self.set_exclude_status,
+            'exclude-sizes': self.set_exclude_sizes,
+            'exclude-texts': self.set_exclude_texts,
+        }
+
+    async def start(self, port: int) -> None:
+        self.server = await asyncio.start_server(self.handle_client, '127.0.0.1', port)
+
+    async def close(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode(errors='replace').strip()
+                if line == '':
+                    continue
+                writer.write(f'{self.execute(line)}\n'.encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def execute(self, line: str) -> str:
+        command, _, arg = line.partition(' ')
+        handler = self.commands.get(command.lower())
+        if handler is None:
+            return f'error: unknown command "{command}", try "help"'
+        try:
+            reply = handler(arg.strip())
+        except ValueError as e:
+            return f'error: {e}'
+        if command.lower() not in ('help', 'status'):
+            self.controller.out.progress.print(f'Control: {line}', style='dim cyan')
+        return reply
+
+    def help(self, arg: str) -> str:
+        return 'commands: ' + ', '.join(self.commands)
+
+    def status(self, arg: str) -> str:
+        c = self.controller
+        return (f'paused={c.paused} in_flight={c.throttle.active} limit={c.throttle.limit} rate={c.throttle.rate} '
+                f'include_status={c.include_status} exclude_status={c.exclude_status} '
+                f'exclude_sizes={c.exclude_sizes} exclude_texts={c.exclude_texts}')
+
+    def pause(self, arg: str) -> str:
+        self.controller.pause()
+        return 'ok'
+
+    def resume(self, arg: str) -> str:
+        self.controller.resume()
+        return 'ok'
+
+    def set_limit(self, arg: str) -> str:
+        # 连接池的大小在启动时就固定了，超过它的并发没有意义
+        limit = int(arg)
+        if not 0 < limit <= self.controller.limit:
+            raise ValueError(f'limit must be between 1 and {self.controller.limit}')
+        self.controller.throttle.set_limit(limit)
+        return 'ok'
+
+    def set_rate(self, arg: str) -> str:
+        self.controller.throttle.set_rate(Option.parse_rate(arg))
+        return 'ok'
+
+    def set_include_status(self, arg: str) -> str:
+        self.controller.include_status = Option.parse_status_codes(arg) if arg else []
+        return 'ok'
+
+    def set_exclude_status(self, arg: str) -> str:
+        self.controller.exclude_status = Option.parse_status_codes(arg) if arg else []
+        return 'ok'
+
+    def set_exclude_sizes(self, arg: str) -> str:
+        self.controller.exclude_sizes = [s.strip().upper() for s in arg.split(',')] if arg else []
+        return 'ok'
+
+    def set_exclude_texts(self, arg: str) -> str:
+        self.controller.exclude_texts = arg.split(',') if arg else []
+        return 'ok'
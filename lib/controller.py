@@ -1,16 +1,24 @@
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import os
 import platform
+import sys
 from queue import Queue
 from urllib import parse
 import signal
 
 from aiohttp.client_exceptions import ClientConnectionError
 
+from lib.baseline import Baseline
+from lib.control import ControlServer
 from lib.fuzzer import Fuzzer
+from lib.inspector import match_texts
+from lib.proxy import ProxyPool
 from lib.response import Response
-from lib.requester import Requester
+from lib.requester import Requester, PROXY_ERRORS
 from lib.option import Option
 from lib.output import Output
+from lib.throttle import Throttle
 
 
 class Controller:
@@ -32,6 +40,10 @@ class Controller:
         self.recursive = option.recursive
         self.max_depth = option.max_depth
         self.exclude_response = option.exclude_response
+        self.baseline = option.baseline
+        self.save = option.save
+        self.results = {}
+        self.gone = set()
 
         self.use_random_agents = option.use_random_agents
         if self.use_random_agents:
@@ -43,21 +55,44 @@ class Controller:
             for subdir in option.subdirs:
                 self.directories.put_nowait(subdir)
 
+        self.requester = None
+        self.executor = None
         self.current_fuzzer = None
+        self.paused = False
+        self.prompting = False
+        self.term_settings = None
         self.loop = asyncio.get_event_loop()
+        self.throttle = Throttle(self.limit, option.rate)
+        # 代理池在所有目标间共享，健康状态可以延续
+        self.proxy_pool = None
+        if len(option.proxies) > 0:
+            self.proxy_pool = ProxyPool(option.proxies, option.proxy_limit, option.proxy_strategy, PROXY_ERRORS)
         if platform.system() is not "Windows":
             self.loop.add_signal_handler(signal.SIGINT, self.handle_interrupt)
+
+        self.control = None
+        if option.control_port:
+            self.control = ControlServer(self)
+            self.loop.run_until_complete(self.control.start(option.control_port))
+
         self.start()
 
+        if self.control:
+            self.loop.run_until_complete(self.control.close())
+        self.save_results()
+        if self.executor:
+            self.executor.shutdown()
+
     def start(self) -> None:
         for target in self.targets:
             self.out.print_target(target)
-            requester = Requester(
+            requester = self.requester = Requester(
                 target,
                 self.limit,
                 self.proxy,
                 self.timeout,
-                self.redirect
+                self.redirect,
+                self.proxy_pool
             )
             # 如果指定了子目录，就忽略根目录
             if self.directories.qsize() == 0:
@@ -69,13 +104,17 @@ class Controller:
             if self.use_random_agents:
                 requester.set_random_agents(self.random_agents)
 
+            if self.baseline:
+                requester.set_baseline(self.baseline)
+
             requester.init_session()
 
-            try:
-                # Test request to see if server is up
-                self.loop.run_until_complete(requester.get(''))
-            except ClientConnectionError:
+            if not self.is_up(requester):
                 print(f'{target} is not up')
+                # 目标不可达时无法判断变化，沿用上一次的结果
+                if self.baseline:
+                    for record in self.baseline.missing(target, self.results):
+                        self.results[record['url']] = record
                 continue
 
             fuzzer = self.current_fuzzer = Fuzzer(
@@ -84,29 +123,85 @@ class Controller:
                 self.match_callback,
                 self.not_found_callback,
                 self.error_callback,
-                self.exclude_response
+                self.throttle,
+                self.exclude_response,
+                prepare_callback=self.prepare_response
             )
-            fuzzer.resume()
+            if not self.paused:
+                fuzzer.resume()
             while not self.directories.empty():
                 self.current_dir = self.directories.get_nowait()
                 self.out.init_task(self.current_dir)
                 self.loop.run_until_complete(fuzzer.start(self.current_dir))
                 self.out.finish()
 
+            if self.baseline:
+                for record in self.baseline.missing(target, self.results):
+                    self.gone.add(record['url'])
+                    self.out.print_gone(record)
+
             self.loop.run_until_complete(requester.close())
 
+    def is_up(self, requester: Requester) -> bool:
+        """Test request to see if server is up"""
+        if not self.proxy_pool:
+            try:
+                self.loop.run_until_complete(requester.get(''))
+            except ClientConnectionError:
+                return False
+            return True
+
+        # 单个代理的故障不代表目标不可达，逐个代理尝试，全部失败才算不可达
+        for proxy in self.proxy_pool.proxies:
+            try:
+                resp = self.loop.run_until_complete(requester.get('', proxy))
+            except (ClientConnectionError,) + PROXY_ERRORS:
+                continue
+            if resp.status not in self.proxy_pool.proxy_error_status:
+                return True
+        return False
+
+    def save_results(self, interrupted: bool = False) -> None:
+        if not self.save:
+            return
+        results = dict(self.results)
+        if interrupted and self.baseline:
+            # 扫描没有完成，只有确认消失的结果才能丢弃，其余沿用上一次的记录，
+            # 否则下一次以它为 baseline 时会把没扫到的路径都报成 new
+            for url, record in self.baseline.records.items():
+                if url not in results and url not in self.gone:
+                    results[url] = record
+        Baseline.dump(list(results.values()), self.save)
+
+    def entry_url(self, entry: str) -> str:
+        """字典项对应的完整 URL，与 Fuzzer 发出请求时的拼接方式一致"""
+        return str(self.requester.build_url(parse.urljoin(self.current_dir, entry)))
+
     def match_callback(self, resp: Response, entry: str) -> None:
+        url = self.entry_url(entry)
+        if resp.status == 304 and self.baseline and url in self.baseline:
+            # 内容没有变化，沿用上一次的结果，但仍然需要递归
+            record = self.results[url] = self.baseline.get(url)
+            self.recurse(entry, record['redirect'])
+            self.out.step()
+            return
+
         if not self.valid(resp):
             self.out.step()
             return
 
-        if self.recursive:
-            if resp.redirect:
-                self.add_redirect_directory(entry, resp.redirect)
-            else:
-                self.add_directory(entry)
+        self.recurse(entry, resp.redirect)
 
-        self.out.print_result(resp, parse.urljoin(self.current_dir, entry.lstrip('/')))
+        path = parse.urljoin(self.current_dir, entry.lstrip('/'))
+        record = self.results[url] = Baseline.record(url, path, resp)
+        if self.baseline:
+            change = self.baseline.compare(record)
+            if change is None:
+                self.out.step()
+                return
+            self.out.print_result(resp, path, change)
+        else:
+            self.out.print_result(resp, path)
 
     def not_found_callback(self, entry: str) -> None:
         # self.out.progress.print(f'Not Found: {entry}')
@@ -114,8 +209,20 @@ class Controller:
 
     def error_callback(self, entry: str, err: str) -> None:
         # self.out.progress.print(f'[red]{err}: {entry}')
+        if self.baseline:
+            # 请求出错时无法判断是否消失，沿用上一次的结果
+            url = self.entry_url(entry)
+            if url in self.baseline:
+                self.results[url] = self.baseline.get(url)
         self.out.record_error(err)
 
+    def recurse(self, entry: str, redirect: str) -> None:
+        if self.recursive:
+            if redirect:
+                self.add_redirect_directory(entry, redirect)
+            else:
+                self.add_directory(entry)
+
     def add_directory(self, path: str) -> bool:
         # 是否将路径视为目录，取决于字典
         if not path.endswith('/'):
@@ -151,39 +258,89 @@ class Controller:
         if self.exclude_sizes and resp.size in self.exclude_sizes:
             return False
         if self.exclude_texts:
-            for exclude_text in self.exclude_texts:
-                if exclude_text in str(resp):
-                    return False
+            if resp.text_excluded is None:
+                resp.text_excluded = match_texts(resp.body, self.encoded_texts())
+            if resp.text_excluded:
+                return False
 
         return True
 
-    def handle_interrupt(self) -> None:
-        import termios, sys, tty
+    def encoded_texts(self) -> list:
+        return [exclude_text.encode() for exclude_text in self.exclude_texts]
 
-        def _getch():
-            """读取用户输入，但是不需要按回车"""
-            fd = sys.stdin.fileno()
-            old_settings = termios.tcgetattr(fd)
-            try:
-                tty.setraw(fd)
-                ch = sys.stdin.read(1)  # This number represents the length
-            finally:
-                termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-            return ch
-
-        self.current_fuzzer.pause()
-
-        try:
-            while True:
-                self.out.progress.print(f'Fuzzer paused, you can choose \[q]uit or \[c]ontinue', style='dim red')
-                option = _getch()
-                if option.lower() == 'q':
-                    self.out.finish(interrupt=True)
-                    exit(0)
-                elif option.lower() == 'c':
-                    self.current_fuzzer.resume()
-                    return
-                else:
-                    continue
-        except KeyboardInterrupt or SystemExit:
-            raise KeyboardInterrupt
+    async def prepare_response(self, resp: Response) -> None:
+        """
+        提前算好大响应的文本过滤结果。bytes 的匹配全程持有 GIL，放到线程里也会卡住事件循环，
+        所以交给子进程
+        """
+        if not self.exclude_texts:
+            return
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor()
+        resp.text_excluded = await self.loop.run_in_executor(
+            self.executor, match_texts, resp.body, self.encoded_texts())
+
+    def pause(self) -> None:
+        self.paused = True
+        if self.current_fuzzer:
+            self.current_fuzzer.pause()
+            self.loop.create_task(self.report_drained())
+
+    def resume(self) -> None:
+        self.paused = False
+        self.stop_prompt()
+        if self.current_fuzzer:
+            self.current_fuzzer.resume()
+
+    async def report_drained(self) -> None:
+        fuzzer = self.current_fuzzer
+        await fuzzer.drain()
+        if fuzzer.paused:
+            self.out.progress.print('All in-flight requests finished', style='dim red')
+
+    def quit(self) -> None:
+        self.stop_prompt()
+        if self.out.task is not None:
+            self.out.finish(interrupt=True)
+        self.save_results(interrupted=True)
+        if self.executor:
+            self.executor.shutdown(wait=False)
+        exit(0)
+
+    def handle_interrupt(self) -> None:
+        # 暂停时再次 Ctrl-C，或者没有终端可以交互，直接退出
+        if self.prompting or self.current_fuzzer is None or not sys.stdin.isatty():
+            self.quit()
+
+        self.pause()
+        self.out.progress.print(
+            f'Fuzzer paused, waiting for {self.current_fuzzer.in_flight} in-flight requests, '
+            f'you can choose \\[q]uit or \\[c]ontinue', style='dim red')
+        self.start_prompt()
+
+    def start_prompt(self) -> None:
+        """不阻塞事件循环地监听按键，已发出的请求可以继续完成"""
+        import termios, tty
+
+        fd = sys.stdin.fileno()
+        self.term_settings = termios.tcgetattr(fd)
+        tty.setcbreak(fd)
+        self.loop.add_reader(fd, self.handle_key)
+        self.prompting = True
+
+    def stop_prompt(self) -> None:
+        import termios
+
+        if not self.prompting:
+            return
+        fd = sys.stdin.fileno()
+        self.loop.remove_reader(fd)
+        termios.tcsetattr(fd, termios.TCSADRAIN, self.term_settings)
+        self.prompting = False
+
+    def handle_key(self) -> None:
+        keys = os.read(sys.stdin.fileno(), 1024).decode(errors='ignore').lower()
+        if 'q' in keys:
+            self.quit()
+        elif 'c' in keys:
+            self.resume()
@@ -1,5 +1,5 @@
 import asyncio
-from typing import Callable
+from typing import Awaitable, Callable
 from urllib import parse
 import functools
 
@@ -7,6 +7,7 @@ from lib.requester import Requester
 from lib.inspector import Inspector
 from lib.response import Response
 from lib.dictionary import Dictionary
+from lib.throttle import Throttle
 
 
 class Fuzzer:
@@ -17,7 +18,10 @@ class Fuzzer:
             match_callback: Callable[[Response, str], None],
             not_found_callback: Callable[[str], None],
             error_callback: Callable[[str, str], None],
-            exclude_response: str = None
+            throttle: Throttle,
+            exclude_response: str = None,
+            offload_size: int = 64 * 1024,
+            prepare_callback: Callable[[Response], Awaitable[None]] = None
     ) -> None:
 
         self.requester = requester
@@ -25,10 +29,15 @@ class Fuzzer:
         self.match_callback = match_callback
         self.not_found_callback = not_found_callback
         self.error_callback = error_callback
+        self.throttle = throttle
+        self.offload_size = offload_size
+        self.prepare_callback = prepare_callback
         self.current_dir = ''
 
         self.job_num = 0
         self.running = asyncio.Event()
+        self.completed = []
+        self.has_completed = asyncio.Event()
         self.inspector = Inspector(requester, exclude_response)
 
     def set_current_dir(self, directory: str) -> None:
@@ -39,6 +48,7 @@ class Fuzzer:
         if base_path:
             self.set_current_dir(base_path)
 
+        classifier = asyncio.create_task(self.classify())
         for entry in self.fuzz_dict:
             self.job_num += 1
             asyncio.create_task(self.search(entry))
@@ -46,9 +56,19 @@ class Fuzzer:
         # 等待所有任务完成
         while self.job_num > 0:
             await asyncio.sleep(1)
+        classifier.cancel()
 
     async def search(self, entry: str) -> None:
-        await self.running.wait()
+        while True:
+            await self.running.wait()
+            await self.throttle.wait_rate()
+            # 排队期间可能被暂停了，重新等待恢复
+            if not self.running.is_set():
+                continue
+            await self.throttle.acquire()
+            if self.running.is_set():
+                break
+            self.throttle.release()
 
         path = parse.urljoin(self.current_dir, entry)
         task = asyncio.create_task(self.requester.get(path))
@@ -61,13 +81,68 @@ class Fuzzer:
     def resume(self) -> None:
         self.running.set()
 
+    @property
+    def paused(self) -> bool:
+        return not self.running.is_set()
+
+    @property
+    def in_flight(self) -> int:
+        return self.throttle.active
+
+    async def drain(self) -> None:
+        """等待已发出的请求全部完成"""
+        while self.in_flight > 0:
+            await asyncio.sleep(0.1)
+
     def handle_resp(self, entry: str, result: asyncio.Task) -> None:
         """
-        处理任务结果，根据情况调用 callback
+        请求完成后只登记结果，具体的判断交给 classify 批量处理，避免阻塞其他连接的读取
+        @param entry: 当前任务对应的字典项
+        @param result: 任务结果
+        """
+        self.throttle.release()
+        self.completed.append((entry, result))
+        self.has_completed.set()
+
+    async def classify(self) -> None:
+        """批量处理已完成的请求，较大的 body 先在事件循环之外做好预处理"""
+        loop = asyncio.get_event_loop()
+        while True:
+            await self.has_completed.wait()
+            self.has_completed.clear()
+            batch, self.completed = self.completed, []
+
+            large = [
+                result.result() for _, result in batch
+                if not result.cancelled() and result.exception() is None
+                and len(result.result()) >= self.offload_size
+            ]
+            if large:
+                preparing = [loop.run_in_executor(None, self.prepare, large)]
+                if self.prepare_callback:
+                    preparing.extend(self.prepare_callback(resp) for resp in large)
+                try:
+                    await asyncio.gather(*preparing)
+                except Exception:
+                    # 预处理只是提前算好结果，失败了 inspect 会在事件循环中重新计算
+                    pass
+
+            for entry, result in batch:
+                self.job_num -= 1
+                self.inspect(entry, result)
+
+    @staticmethod
+    def prepare(responses: list) -> None:
+        """在线程池中执行，hashlib 处理大块数据时会释放 GIL"""
+        for resp in responses:
+            resp.digest
+
+    def inspect(self, entry: str, result: asyncio.Task) -> None:
+        """
+        根据任务结果调用对应的 callback
         @param entry: 当前任务对应的字典项
         @param result: 任务结果
         """
-        self.job_num -= 1
         try:
             resp = result.result()
             status = self.inspector.scan(resp)
@@ -76,5 +151,5 @@ class Fuzzer:
                 self.match_callback(resp, entry)
             else:
                 self.not_found_callback(entry)
-        except Exception as e:
+        except (Exception, asyncio.CancelledError) as e:
             self.error_callback(entry, e.__class__.__name__)
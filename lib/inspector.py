@@ -10,6 +10,14 @@ def rand_string(length: int) -> str:
     return ''.join([random.choice(seq) for _ in range(length)])
 
 
+def match_texts(body: bytes, texts: list) -> bool:
+    """body 中是否包含任意一个文本，直接匹配原始 body，省去解码的开销"""
+    for text in texts:
+        if text in body:
+            return True
+    return False
+
+
 class Inspector(object):
     def __init__(self, requester, calibration=None):
         self.requester = requester
@@ -31,7 +39,7 @@ class Inspector(object):
         if self.response.redirect:
             self.location = parse.urlparse(self.response.redirect).path
 
-        self.hash = hash(first_response)
+        self.hash = first_response.digest
 
     def scan(self, response: Response) -> bool:
         if self.response.status == response.status == 404:
@@ -42,7 +50,7 @@ class Inspector(object):
         if response.redirect and self.location == parse.urlparse(response.redirect).path:
             return False
 
-        if self.hash and hash(response) == self.hash:
+        if self.hash and response.digest == self.hash:
             return False
 
         return True
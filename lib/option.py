@@ -1,5 +1,7 @@
+import math
 from argparse import ArgumentParser, Namespace
 
+from lib.baseline import Baseline
 from lib.dictionary import Dictionary
 from os import path
 from ipaddress import ip_network, ip_address
@@ -10,6 +12,8 @@ class Option:
         self.script_path = script_path
         self.default_max_depth = 3
         self.default_conn_limit = 100
+        self.default_proxy_limit = 20
+        self.default_timeout = 10
         self.default_extensions = ['html']
 
         option = self.parse_arguments()
@@ -19,8 +23,12 @@ class Option:
         except ValueError:
             self.targets = self.parse_targets_file(option.targets)
 
-        self.include_status = self.parse_status_codes(option.include_status) if option.include_status else []
-        self.exclude_status = self.parse_status_codes(option.exclude_status) if option.exclude_status else []
+        try:
+            self.include_status = self.parse_status_codes(option.include_status) if option.include_status else []
+            self.exclude_status = self.parse_status_codes(option.exclude_status) if option.exclude_status else []
+        except ValueError as e:
+            print(e)
+            exit(1)
 
         try:
             if option.extensions:
@@ -63,8 +71,18 @@ class Option:
         else:
             self.proxy = option.proxy
 
+        self.proxies = self.parse_proxies_file(option.proxy_file) if option.proxy_file else []
+        self.proxy_strategy = option.proxy_strategy
+        self.proxy_limit = option.proxy_limit
+
         self.limit = option.limit
+        try:
+            self.rate = self.parse_rate(option.rate)
+        except ValueError as e:
+            print(e)
+            exit(1)
         self.timeout = option.timeout
+        self.control_port = option.control_port
 
         self.headers = {}
         if option.headers:
@@ -72,6 +90,18 @@ class Option:
                 hn, hv = h.split(':', 1)
                 self.headers[hn.strip()] = hv.strip()
 
+        self.baseline = None
+        if option.baseline:
+            try:
+                self.baseline = Baseline.load(option.baseline)
+            except FileNotFoundError:
+                print('The baseline file does not exists.')
+                exit(0)
+            except (ValueError, KeyError, TypeError):
+                print('Invalid baseline file.')
+                exit(1)
+        self.save = option.save
+
         self.redirect = option.redirect
         self.recursive = option.recursive
         self.max_depth = option.max_depth
@@ -88,11 +118,18 @@ class Option:
                 else:
                     status_codes.append(int(status_code.strip()))
             except ValueError:
-                print("Invalid status code or status code range: {0}".format(
+                raise ValueError("Invalid status code or status code range: {0}".format(
                     status_code))
-                exit(1)
         return list(set(status_codes))
 
+    @staticmethod
+    def parse_rate(raw_rate) -> float:
+        rate = float(raw_rate)
+        # nan/inf 会让速率限制的计时失效
+        if not math.isfinite(rate) or rate < 0:
+            raise ValueError(f'Invalid rate: {raw_rate}, must be a finite number not less than 0')
+        return rate
+
     @staticmethod
     def parse_targets(raw_target: str) -> list:
         targets = list()
@@ -122,6 +159,23 @@ class Option:
             exit(0)
         return targets
 
+    @staticmethod
+    def parse_proxies_file(raw_proxies: str) -> list:
+        proxies = list()
+        try:
+            with open(raw_proxies) as proxy_file:
+                for item in proxy_file.readlines():
+                    item = item.strip()
+                    if item == '' or item.startswith('#'):
+                        continue
+                    if not item.startswith('http'):
+                        item = 'http://' + item
+                    proxies.append(item)
+        except FileNotFoundError:
+            print('The proxy file does not exists.')
+            exit(0)
+        return proxies
+
     def parse_arguments(self) -> Namespace:
         parser = ArgumentParser()
 
@@ -134,6 +188,13 @@ class Option:
                             action='store_true', help='recursive mode')
         parser.add_argument('-R', '--max-depth', help='maximum recursion depth', action='store',
                             type=int, dest='max_depth', default=self.default_max_depth)
+        parser.add_argument('--control', type=int, dest='control_port', metavar='PORT',
+                            help='listen on 127.0.0.1:PORT for runtime commands (pause, limit, rate, filters...)')
+
+        parser.add_argument('-o', '--save', metavar='PATH',
+                            help='save results as JSON, can be used as baseline of the next scan')
+        parser.add_argument('--baseline', metavar='PATH',
+                            help='results of a previous scan, only report new, gone or changed paths')
 
         filter_group = parser.add_argument_group("Filter options")
 
@@ -155,11 +216,20 @@ class Option:
         req_group.add_argument('--random-agent', dest='use_random_agents', action='store_true',
                                help='choose a random User-Agent for each request')
         req_group.add_argument('-p', '--proxy', help='HTTP proxy')
+        req_group.add_argument('--proxy-file', dest='proxy_file', metavar='PATH',
+                               help='load a pool of HTTP proxies from file, one per line')
+        req_group.add_argument('--proxy-strategy', dest='proxy_strategy', default='round-robin',
+                               choices=['round-robin', 'least-loaded'],
+                               help='how to pick a proxy from the pool for each request, default is round-robin')
+        req_group.add_argument('--proxy-limit', dest='proxy_limit', type=int, default=self.default_proxy_limit,
+                               help='maximum number of concurrent connections per proxy, default is 20')
         req_group.add_argument('--limit', type=int, default=self.default_conn_limit,
                                help='maximum number of concurrent connections, default is 100')
+        req_group.add_argument('--rate', type=float, default=0,
+                               help='maximum number of requests per second, default is unlimited')
         req_group.add_argument('--redirect', action='store_true',
                                help='follow redirection')
-        req_group.add_argument('--timeout', type=int,
-                               metavar='SECOND', help='request timeout')
+        req_group.add_argument('--timeout', type=int, default=self.default_timeout,
+                               metavar='SECOND', help='connect and read timeout of requests, default is 10')
 
         return parser.parse_args()
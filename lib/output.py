@@ -14,6 +14,9 @@ from lib.response import Response
 class Output:
     def __init__(self, option: Option) -> None:
         self.option = option
+        proxy_info = ''
+        if option.proxies:
+            proxy_info = f'\n[#ffffbe]Proxy pool:[/#ffffbe] {len(option.proxies)} ({option.proxy_strategy})'
         self.banner = Panel.fit(
             f'''[magenta]        __   __   ___       __   __       
  /\  | |__) /__` |__   /\  |__) /  ` |__| 
@@ -21,7 +24,7 @@ class Output:
 [/magenta]
 [#ffffbe]Extensions:[/#ffffbe] {", ".join(option.extensions)}
 [#ffffbe]Wordlist size:[/#ffffbe] {len(option.wordlist)}
-[#ffffbe]Connection limit:[/#ffffbe] {option.limit}''', subtitle='by 4shen0ne', subtitle_align='right')
+[#ffffbe]Connection limit:[/#ffffbe] {option.limit}{proxy_info}''', subtitle='by 4shen0ne', subtitle_align='right')
         self.progress = Progress(
             SpinnerColumn(),
             TextColumn('{task.fields[directory]}'),
@@ -52,16 +55,20 @@ class Output:
         self.progress.update(self.task, visible=False)
         self.progress.stop()
 
-    def print_result(self, resp: Response, path: str) -> None:
+    def print_result(self, resp: Response, path: str, change: str = None) -> None:
         status = resp.status
+        label = f'[yellow]\\[{change.upper()}] ' if change else ''
         if 200 <= status < 300:
-            self.progress.print(f'[green]{status} - {resp.size} - {path}')
+            self.progress.print(f'{label}[green]{status} - {resp.size} - {path}')
         elif 300 <= status < 400 and resp.redirect:
-            self.progress.print(f'[blue]{status} - {resp.size} - {path}[white] --> {resp.redirect}')
+            self.progress.print(f'{label}[blue]{status} - {resp.size} - {path}[white] --> {resp.redirect}')
         else:
-            self.progress.print(f'[white]{status} - {resp.size} - {path}')
+            self.progress.print(f'{label}[white]{status} - {resp.size} - {path}')
         self.progress.advance(self.task)
 
+    def print_gone(self, record: dict) -> None:
+        self.progress.print(f'[yellow]\\[GONE] [dim]{record["status"]} - {record["size"]} - {record["url"]}')
+
     def print_target(self, target: str):
         self.progress.print(f'Target: {target}\n', style='cyan')
 
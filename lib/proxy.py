@@ -0,0 +1,152 @@
+import asyncio
+import time
+from itertools import cycle
+from typing import Awaitable, Callable
+
+
+class Proxy:
+    def __init__(self, url: str, limit: int) -> None:
+        self.url = url
+        self.limit = limit
+        self.active = 0
+        self.latency = None
+        self.samples = 0
+        self.fails = 0
+        self.ejected_until = 0.0
+        self.semaphore = asyncio.Semaphore(limit)
+
+    @property
+    def load(self) -> float:
+        """进行中和排队中的请求数相对并发限制的比例"""
+        return self.active / self.limit
+
+    def healthy(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def __str__(self):
+        return self.url
+
+
+class ProxyPool:
+    def __init__(
+            self,
+            urls: list,
+            limit: int,
+            strategy: str = 'round-robin',
+            proxy_errors: tuple = (),
+            max_fails: int = 5,
+            cooldown: int = 30,
+            slow_factor: float = 3,
+            min_samples: int = 5,
+            smoothing: float = 0.3
+    ) -> None:
+        """
+        @param proxy_errors: 由代理本身引起的异常类型，只有它们才计入代理的失败次数
+        @param slow_factor: 延迟超过最快代理的多少倍时剔除
+        @param min_samples: 至少有多少次成功请求后才按延迟判断
+        """
+        self.proxies = [Proxy(url, limit) for url in dict.fromkeys(urls)]
+        self.strategy = strategy
+        self.proxy_errors = proxy_errors
+        # 502/503 经常是目标或 WAF 返回的，只有 407 能确定来自代理
+        self.proxy_error_status = (407,)
+        self.max_fails = max_fails
+        self.cooldown = cooldown
+        self.slow_factor = slow_factor
+        self.min_samples = min_samples
+        self.smoothing = smoothing
+        self._cycle = cycle(self.proxies)
+
+    def __len__(self):
+        return len(self.proxies)
+
+    def select(self) -> Proxy:
+        """
+        根据策略挑选一个未被剔除的代理
+        @return: 选中的代理，全部被剔除时返回 None
+        """
+        now = time.monotonic()
+        if self.strategy == 'least-loaded':
+            candidates = [p for p in self.proxies if p.healthy(now)]
+            if candidates:
+                # 负载相同时优先选延迟低的，未测过延迟的视为 0
+                return min(candidates, key=lambda p: (p.load, p.latency or 0))
+        else:
+            for _ in range(len(self.proxies)):
+                proxy = next(self._cycle)
+                if proxy.healthy(now):
+                    return proxy
+
+        return None
+
+    async def acquire(self) -> Proxy:
+        """挑选一个代理，全部被剔除时等到最早冷却结束的那个重新加入"""
+        while True:
+            proxy = self.select()
+            if proxy:
+                return proxy
+            wakeup = min(p.ejected_until for p in self.proxies)
+            await asyncio.sleep(max(wakeup - time.monotonic(), 0))
+
+    def eject(self, proxy: Proxy) -> None:
+        """暂时剔除，冷却后重新加入并重新测量延迟"""
+        proxy.fails = 0
+        proxy.latency = None
+        proxy.samples = 0
+        proxy.ejected_until = time.monotonic() + self.cooldown
+
+    def record_success(self, proxy: Proxy, elapsed: float) -> None:
+        proxy.fails = 0
+        proxy.samples += 1
+        if proxy.latency is None:
+            proxy.latency = elapsed
+        else:
+            proxy.latency += self.smoothing * (elapsed - proxy.latency)
+
+        if proxy.samples < self.min_samples:
+            return
+        now = time.monotonic()
+        fastest = min(
+            (p.latency for p in self.proxies
+             if p is not proxy and p.latency is not None and p.samples >= self.min_samples and p.healthy(now)),
+            default=None
+        )
+        # 目标变慢时所有代理一起变慢，所以只和其他代理比较
+        if fastest is not None and proxy.latency > fastest * self.slow_factor:
+            self.eject(proxy)
+
+    def record_failure(self, proxy: Proxy) -> None:
+        proxy.fails += 1
+        if proxy.fails >= self.max_fails:
+            self.eject(proxy)
+
+    def is_proxy_error(self, error: Exception) -> bool:
+        return isinstance(error, self.proxy_errors)
+
+    async def request(self, send: Callable[[str], Awaitable], proxy: Proxy = None):
+        """
+        挑选一个代理并占用它的一个并发名额发送请求，请求结束后更新健康状态
+        @param send: 接收代理地址、返回响应的协程函数
+        @param proxy: 指定使用的代理，不经过挑选
+        @return: send 的返回值
+        """
+        if proxy is None:
+            proxy = await self.acquire()
+        # 排队等待的请求也计入负载，避免 least-loaded 把请求都堆到同一个代理上
+        proxy.active += 1
+        try:
+            async with proxy.semaphore:
+                start = time.monotonic()
+                try:
+                    resp = await send(proxy.url)
+                except self.proxy_errors:
+                    self.record_failure(proxy)
+                    raise
+                # 读取 body 超时、目标断开等错误和代理无关，不计入
+                if resp.status in self.proxy_error_status:
+                    self.record_failure(proxy)
+                else:
+                    self.record_success(proxy, time.monotonic() - start)
+                return resp
+        finally:
+            proxy.active -= 1
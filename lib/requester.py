@@ -1,12 +1,24 @@
 import aiohttp
+from aiohttp.client_exceptions import ClientHttpProxyError, ClientProxyConnectionError, ServerTimeoutError
 from urllib import parse
 from random import choice
 
 from yarl import URL
 
+from lib.baseline import Baseline
+from lib.proxy import Proxy, ProxyPool
 from lib.response import Response
 
 
+
+class ProxyTimeoutError(ServerTimeoutError):
+    """经过代理时，在收到响应之前就超时了"""
+
+
+# 由代理本身引起的错误，用于代理池的健康统计
+PROXY_ERRORS = (ClientProxyConnectionError, ClientHttpProxyError, ProxyTimeoutError)
+
+
 class Requester:
     def __init__(
             self,
@@ -14,14 +26,17 @@ class Requester:
             limit: int,
             proxy: str,
             timeout: int = 5,
-            redirect: bool = False
+            redirect: bool = False,
+            proxy_pool: ProxyPool = None
     ) -> None:
         self.base_url = url
         self.proxy = proxy if proxy else ''
+        self.proxy_pool = proxy_pool
         self.redirect = redirect
         self.limit = limit
-        self.timeout = aiohttp.ClientTimeout(connect=timeout)
+        self.timeout = aiohttp.ClientTimeout(connect=timeout, sock_read=timeout)
         self.random_agents = None
+        self.baseline = None
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/87.0.4280.88 Safari/537.36",
             "Accept-Language": "*",
@@ -40,13 +55,37 @@ class Requester:
     def set_random_agents(self, agents: list) -> None:
         self.random_agents = list(set(agents))
 
-    async def get(self, path: str) -> Response:
-        url = URL(parse.urljoin(self.base_url, path), encoded=('%' in path))
+    def set_baseline(self, baseline: Baseline) -> None:
+        self.baseline = baseline
+
+    def build_url(self, path: str) -> URL:
+        return URL(parse.urljoin(self.base_url, path), encoded=('%' in path))
+
+    async def get(self, path: str, proxy: Proxy = None) -> Response:
+        """
+        @param proxy: 指定代理池中的某个代理，默认由代理池挑选
+        """
+        url = self.build_url(path)
         if self.random_agents:
             self.set_header('User-Agent', choice(self.random_agents))
-        async with self.session.get(
-                url, headers=self.headers, proxy=self.proxy, timeout=self.timeout, allow_redirects=self.redirect
-        ) as resp:
+        headers = self.headers
+        if self.baseline:
+            headers = {**headers, **self.baseline.conditional_headers(str(url))}
+        if self.proxy_pool:
+            return await self.proxy_pool.request(lambda p: self.request(url, headers, p), proxy)
+        return await self.request(url, headers, self.proxy)
+
+    async def request(self, url: URL, headers: dict, proxy: str) -> Response:
+        try:
+            resp = await self.session.get(
+                url, headers=headers, proxy=proxy, timeout=self.timeout, allow_redirects=self.redirect
+            )
+        except ServerTimeoutError as e:
+            # 连接代理、建立隧道和等待响应头都要经过代理，这个阶段的超时算作代理的问题
+            if proxy:
+                raise ProxyTimeoutError(*e.args) from e
+            raise
+        async with resp:
             return Response(resp.url, resp.status, resp.reason, resp.headers, await resp.content.read())
 
     async def close(self) -> None:
@@ -1,3 +1,6 @@
+import hashlib
+
+
 class Response:
     def __init__(
             self,
@@ -12,11 +15,29 @@ class Response:
         self.reason = reason
         self.headers = headers
         self.body = body
+        self._digest = None
+        # 大响应的文本过滤结果会在子进程中提前算好
+        self.text_excluded = None
 
     @property
     def redirect(self):
         return self.headers.get('location')
 
+    @property
+    def etag(self):
+        return self.headers.get('etag')
+
+    @property
+    def last_modified(self):
+        return self.headers.get('last-modified')
+
+    @property
+    def digest(self) -> bytes:
+        """body 的摘要，hashlib 处理大块数据时会释放 GIL，可以放到线程池中计算"""
+        if self._digest is None:
+            self._digest = hashlib.md5(self.body).digest()
+        return self._digest
+
     @property
     def size(self):
         """
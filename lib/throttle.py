@@ -0,0 +1,96 @@
+import asyncio
+from collections import deque
+
+
+class Throttle:
+    def __init__(self, limit: int, rate: float = 0) -> None:
+        """
+        可在运行时调整的并发与速率限制
+        @param limit: 最大并发请求数
+        @param rate: 每秒最多发起的请求数，0 表示不限制
+        """
+        self.limit = limit
+        self.rate = rate
+        self.active = 0
+        self._waiters = deque()
+        self._rate_waiters = deque()
+        self._next_start = 0.0
+        self._timer = None
+
+    async def acquire(self) -> None:
+        """占用一个并发名额，应在确定要发出请求时才调用"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # 名额已经转交过来但任务被取消了，要还回去
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self.active -= 1
+        self._wake()
+
+    async def wait_rate(self) -> None:
+        """按速率限制排队等待发出请求的时机，期间不占用并发名额"""
+        if self.rate <= 0:
+            return
+
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        if not self._rate_waiters and now >= self._next_start:
+            self._next_start = now + 1 / self.rate
+            return
+
+        waiter = loop.create_future()
+        self._rate_waiters.append(waiter)
+        self._schedule()
+        await waiter
+
+    def set_limit(self, limit: int) -> None:
+        self.limit = limit
+        self._wake()
+
+    def set_rate(self, rate: float) -> None:
+        self.rate = rate
+        self._next_start = 0.0
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if rate <= 0:
+            while self._rate_waiters:
+                waiter = self._rate_waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+        else:
+            self._schedule()
+
+    def _wake(self) -> None:
+        """把空出来的名额直接交给排队中的请求"""
+        while self._waiters and self.active < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+    def _schedule(self) -> None:
+        if self._timer is None and self._rate_waiters:
+            loop = asyncio.get_event_loop()
+            self._timer = loop.call_at(max(self._next_start, loop.time()), self._tick)
+
+    def _tick(self) -> None:
+        """每次放行一个排队的请求"""
+        self._timer = None
+        while self._rate_waiters:
+            waiter = self._rate_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._next_start = asyncio.get_event_loop().time() + 1 / self.rate
+                break
+        self._schedule()
@@ -0,0 +1,147 @@
+import json
+from queue import Queue
+
+import pytest
+
+from lib.baseline import Baseline
+from lib.controller import Controller
+from lib.requester import Requester
+from lib.response import Response
+
+TARGET = 'http://target.test/'
+
+
+def make_record(url: str, **fields) -> dict:
+    resp = Response(url, 200, '', {'etag': '"v1"', 'last-modified': 'Mon, 01 Jan 2024 00:00:00 GMT'}, b'old')
+    record = Baseline.record(url, url[len(TARGET) - 1:], resp)
+    record.update(fields)
+    return record
+
+
+class FakeOutput:
+    def __init__(self) -> None:
+        self.printed = []
+        self.steps = 0
+        self.errors = 0
+
+    def step(self):
+        self.steps += 1
+
+    def print_result(self, resp, path, change=None):
+        self.printed.append((path, change))
+
+    def record_error(self, message):
+        self.errors += 1
+
+
+def make_controller(records: list, save: str = None) -> Controller:
+    controller = Controller.__new__(Controller)
+    controller.out = FakeOutput()
+    controller.baseline = Baseline(records)
+    controller.save = save
+    controller.results = {}
+    controller.gone = set()
+    controller.requester = Requester(TARGET, 10, None)
+    controller.current_dir = '/'
+    controller.directories = Queue()
+    controller.recursive = True
+    controller.max_depth = 3
+    controller.include_status = []
+    controller.exclude_status = []
+    controller.exclude_sizes = []
+    controller.exclude_texts = []
+    return controller
+
+
+def test_conditional_headers():
+    baseline = Baseline([
+        make_record(TARGET + 'both'),
+        make_record(TARGET + 'none', etag=None, last_modified=None),
+    ])
+
+    assert baseline.conditional_headers(TARGET + 'both') == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT',
+    }
+    assert baseline.conditional_headers(TARGET + 'none') == {}
+    assert baseline.conditional_headers(TARGET + 'unknown') == {}
+
+
+def test_compare():
+    old = make_record(TARGET + 'page')
+    baseline = Baseline([old])
+
+    assert baseline.compare(dict(old)) is None
+    assert baseline.compare(dict(old, digest='0' * 32)) == 'changed'
+    assert baseline.compare(dict(old, status=403)) == 'changed'
+    assert baseline.compare(make_record(TARGET + 'other')) == 'new'
+
+
+def test_missing_is_scoped_to_target():
+    baseline = Baseline([
+        make_record(TARGET + 'seen'),
+        make_record(TARGET + 'lost'),
+        make_record('http://target.test.evil/lost'),
+        make_record('http://other.test/lost'),
+    ])
+
+    missing = baseline.missing('http://target.test/app/', {TARGET + 'seen'})
+
+    assert [record['url'] for record in missing] == [TARGET + 'lost']
+
+
+def test_load_rejects_incomplete_records(tmp_path):
+    path = tmp_path / 'baseline.json'
+    record = make_record(TARGET + 'page')
+    del record['etag']
+    path.write_text(json.dumps([record]))
+
+    with pytest.raises(ValueError):
+        Baseline.load(str(path))
+
+
+def test_not_modified_reuses_record_and_recurses():
+    old = make_record(TARGET + 'admin/')
+    controller = make_controller([old])
+
+    controller.match_callback(Response(TARGET + 'admin/', 304, '', {}, b''), 'admin/')
+
+    assert controller.results == {TARGET + 'admin/': old}
+    assert controller.out.printed == []
+    assert controller.directories.get_nowait() == '/admin/'
+
+
+def test_changed_and_new_are_reported():
+    controller = make_controller([make_record(TARGET + 'page')])
+
+    controller.match_callback(Response(TARGET + 'page', 200, '', {}, b'new'), 'page')
+    controller.match_callback(Response(TARGET + 'fresh', 200, '', {}, b'new'), 'fresh')
+
+    assert controller.out.printed == [('/page', 'changed'), ('/fresh', 'new')]
+
+
+def test_error_keeps_baseline_record():
+    old = make_record(TARGET + 'page')
+    controller = make_controller([old])
+
+    controller.error_callback('page', 'ServerTimeoutError')
+
+    assert controller.results == {TARGET + 'page': old}
+
+
+def test_interrupted_save_merges_unvisited_records(tmp_path):
+    path = tmp_path / 'results.json'
+    seen = make_record(TARGET + 'seen')
+    unvisited = make_record(TARGET + 'unvisited')
+    gone = make_record(TARGET + 'gone')
+    controller = make_controller([seen, unvisited, gone], str(path))
+    controller.results[seen['url']] = dict(seen, digest='0' * 32)
+    controller.gone.add(gone['url'])
+
+    controller.save_results(interrupted=True)
+    interrupted = {record['url'] for record in json.loads(path.read_text())}
+    controller.save_results()
+    finished = {record['url'] for record in json.loads(path.read_text())}
+
+    assert interrupted == {seen['url'], unvisited['url']}
+    assert finished == {seen['url']}
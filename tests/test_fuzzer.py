@@ -0,0 +1,133 @@
+import asyncio
+
+from lib.controller import Controller
+from lib.fuzzer import Fuzzer
+from lib.inspector import Inspector
+from lib.response import Response
+from lib.throttle import Throttle
+
+
+class Words(list):
+    def reset(self):
+        pass
+
+
+class FakeRequester:
+    def __init__(self, bodies: dict, calibration: Response = None) -> None:
+        self.bodies = bodies
+        self.calibration = calibration or Response('', 404, '', {}, b'')
+
+    async def get(self, path: str) -> Response:
+        entry = path.lstrip('/')
+        if entry not in self.bodies:
+            return self.calibration
+        body = self.bodies[entry]
+        if isinstance(body, Exception):
+            raise body
+        return Response(path, 200, '', {}, body)
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.matched = []
+        self.not_found = []
+        self.errors = []
+
+    def match(self, resp, entry):
+        self.matched.append(entry)
+
+    def missing(self, entry):
+        self.not_found.append(entry)
+
+    def error(self, entry, err):
+        self.errors.append((entry, err))
+
+
+def make_fuzzer(requester, recorder, **kwargs):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    fuzzer = Fuzzer(requester, Words(requester.bodies), recorder.match, recorder.missing, recorder.error,
+                    Throttle(100), **kwargs)
+    fuzzer.resume()
+    return loop, fuzzer
+
+
+def test_batches_completed_responses():
+    recorder = Recorder()
+    requester = FakeRequester({f'page{i}': b'x' for i in range(20)})
+    loop, fuzzer = make_fuzzer(requester, recorder, offload_size=0)
+    batches = []
+    fuzzer.prepare = batches.append
+
+    loop.run_until_complete(fuzzer.start('/'))
+
+    assert fuzzer.job_num == 0
+    assert len(recorder.matched) == 20
+    assert len(batches) < 20
+    assert sum(len(batch) for batch in batches) == 20
+
+
+def test_only_large_bodies_are_prepared():
+    recorder = Recorder()
+    requester = FakeRequester({'small': b'x' * 10, 'large': b'x' * 200})
+    prepared = []
+
+    async def prepare_callback(resp):
+        prepared.append(resp.url)
+
+    loop, fuzzer = make_fuzzer(requester, recorder, offload_size=100, prepare_callback=prepare_callback)
+    loop.run_until_complete(fuzzer.start('/'))
+
+    assert prepared == ['/large']
+    assert sorted(recorder.matched) == ['large', 'small']
+
+
+def test_failed_preparation_still_inspects():
+    recorder = Recorder()
+    requester = FakeRequester({'large': b'x' * 200})
+
+    async def prepare_callback(resp):
+        raise RuntimeError()
+
+    loop, fuzzer = make_fuzzer(requester, recorder, offload_size=100, prepare_callback=prepare_callback)
+    loop.run_until_complete(fuzzer.start('/'))
+
+    assert fuzzer.job_num == 0
+    assert recorder.matched == ['large']
+
+
+def test_inspect_error_and_cancelled_results():
+    recorder = Recorder()
+    requester = FakeRequester({'broken': OSError()})
+    loop, fuzzer = make_fuzzer(requester, recorder)
+
+    loop.run_until_complete(fuzzer.start('/'))
+    cancelled = loop.create_future()
+    cancelled.cancel()
+    fuzzer.inspect('gone', cancelled)
+
+    assert recorder.errors == [('broken', 'OSError'), ('gone', 'CancelledError')]
+
+
+def test_inspector_compares_digest():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    calibration = Response('', 200, '', {}, b'soft 404')
+    inspector = Inspector(FakeRequester({}, calibration))
+
+    assert inspector.hash == calibration.digest
+    assert not inspector.scan(Response('', 200, '', {}, b'soft 404'))
+    assert inspector.scan(Response('', 200, '', {}, b'real page'))
+
+
+def test_text_filter_runs_in_subprocess():
+    controller = Controller.__new__(Controller)
+    controller.loop = asyncio.new_event_loop()
+    controller.executor = None
+    controller.exclude_texts = ['needle']
+    resp = Response('', 200, '', {}, b'hay needle hay')
+
+    controller.loop.run_until_complete(controller.prepare_response(resp))
+    controller.executor.shutdown()
+
+    assert resp.text_excluded is True
@@ -0,0 +1,192 @@
+import asyncio
+import time
+
+import pytest
+
+from lib.controller import Controller
+from lib.proxy import ProxyPool
+from lib.requester import PROXY_ERRORS, Requester
+
+
+class ProxyDown(Exception):
+    pass
+
+
+class Resp:
+    def __init__(self, status: int) -> None:
+        self.status = status
+
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+async def start_standin_proxy(silent: bool = False):
+    """本地替身代理：对任何请求都回复 200；silent 时接受连接但从不回复"""
+    async def handle(reader, writer):
+        await reader.readuntil(b'\r\n\r\n')
+        if silent:
+            # 一直等到客户端超时断开
+            await reader.read()
+            writer.close()
+            return
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok')
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    return server, f'http://127.0.0.1:{server.sockets[0].getsockname()[1]}'
+
+
+def test_round_robin():
+    async def main():
+        pool = ProxyPool(['http://a', 'http://b'], 2)
+        used = []
+
+        async def send(proxy):
+            used.append(proxy)
+            return Resp(200)
+
+        for _ in range(4):
+            await pool.request(send)
+        return used
+
+    assert run(main()) == ['http://a', 'http://b', 'http://a', 'http://b']
+
+
+def test_least_loaded_prefers_idle_proxy():
+    async def main():
+        pool = ProxyPool(['http://a', 'http://b'], 2, 'least-loaded')
+        pool.proxies[0].active = 1
+        return pool.select().url
+
+    assert run(main()) == 'http://b'
+
+
+def test_only_proxy_errors_eject():
+    async def main():
+        pool = ProxyPool(['http://a'], 2, proxy_errors=(ProxyDown,), max_fails=2)
+
+        async def target_timeout(proxy):
+            raise asyncio.TimeoutError()
+
+        async def proxy_down(proxy):
+            raise ProxyDown()
+
+        for _ in range(5):
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.request(target_timeout)
+        healthy_after_timeouts = pool.select() is not None
+
+        for _ in range(2):
+            with pytest.raises(ProxyDown):
+                await pool.request(proxy_down)
+        return healthy_after_timeouts, pool.select()
+
+    healthy, selected = run(main())
+    assert healthy
+    assert selected is None
+
+
+def test_proxy_error_status_counts_as_failure():
+    async def main():
+        pool = ProxyPool(['http://a'], 2, max_fails=2)
+
+        async def auth_required(proxy):
+            return Resp(407)
+
+        async def unavailable(proxy):
+            return Resp(503)
+
+        for _ in range(5):
+            await pool.request(unavailable)
+        healthy_after_503 = pool.select() is not None
+
+        for _ in range(2):
+            await pool.request(auth_required)
+        return healthy_after_503, pool.select()
+
+    healthy, selected = run(main())
+    assert healthy
+    assert selected is None
+
+
+def test_waits_for_cooldown_when_all_ejected():
+    async def main():
+        pool = ProxyPool(['http://a', 'http://b'], 2, cooldown=0.2)
+        for proxy in pool.proxies:
+            pool.eject(proxy)
+
+        async def send(proxy):
+            return Resp(200)
+
+        start = time.monotonic()
+        resp = await pool.request(send)
+        return resp.status, time.monotonic() - start
+
+    status, elapsed = run(main())
+    assert status == 200
+    assert elapsed >= 0.15
+
+
+def test_slow_proxy_ejected():
+    async def main():
+        pool = ProxyPool(['http://fast', 'http://slow'], 2, min_samples=2)
+        for _ in range(2):
+            pool.record_success(pool.proxies[0], 0.1)
+        for _ in range(2):
+            pool.record_success(pool.proxies[1], 1.0)
+        return [p.healthy(time.monotonic()) for p in pool.proxies]
+
+    assert run(main()) == [True, False]
+
+
+def test_standin_proxy():
+    async def main():
+        good, good_url = await start_standin_proxy()
+        silent, silent_url = await start_standin_proxy(silent=True)
+        # 1 号端口上没有服务，用来模拟挂掉的代理
+        pool = ProxyPool(['http://127.0.0.1:1', good_url, silent_url], 2, proxy_errors=PROXY_ERRORS, max_fails=1)
+        requester = Requester('http://target.invalid/', 10, None, timeout=1, proxy_pool=pool)
+        requester.init_session()
+        results = []
+        for _ in range(3):
+            try:
+                results.append((await requester.get('index.html')).status)
+            except PROXY_ERRORS as e:
+                results.append(e.__class__.__name__)
+        await requester.close()
+        for server in (good, silent):
+            server.close()
+        now = time.monotonic()
+        return results, [p.healthy(now) for p in pool.proxies]
+
+    results, healthy = run(main())
+    assert results == ['ClientProxyConnectionError', 200, 'ProxyTimeoutError']
+    assert healthy == [False, True, False]
+
+
+def test_up_check_tries_every_proxy():
+    loop = asyncio.new_event_loop()
+    good, good_url = loop.run_until_complete(start_standin_proxy())
+    silent, silent_url = loop.run_until_complete(start_standin_proxy(silent=True))
+    controller = Controller.__new__(Controller)
+    controller.loop = loop
+
+    def is_up(urls):
+        controller.proxy_pool = ProxyPool(urls, 2, proxy_errors=PROXY_ERRORS)
+        requester = Requester('http://target.invalid/', 10, None, timeout=1, proxy_pool=controller.proxy_pool)
+
+        async def init_session():
+            requester.init_session()
+
+        loop.run_until_complete(init_session())
+        try:
+            return controller.is_up(requester)
+        finally:
+            loop.run_until_complete(requester.close())
+
+    assert is_up(['http://127.0.0.1:1', silent_url, good_url])
+    assert not is_up(['http://127.0.0.1:1', silent_url])
+    good.close()
+    silent.close()
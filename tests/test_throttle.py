@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from lib.option import Option
+from lib.throttle import Throttle
+
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+def test_limit():
+    async def main():
+        throttle = Throttle(2)
+        peak = 0
+
+        async def job():
+            nonlocal peak
+            await throttle.acquire()
+            peak = max(peak, throttle.active)
+            await asyncio.sleep(0.01)
+            throttle.release()
+
+        await asyncio.gather(*[job() for _ in range(10)])
+        return peak, throttle.active
+
+    assert run(main()) == (2, 0)
+
+
+def test_rate_wait_holds_no_slot():
+    async def main():
+        throttle = Throttle(2, rate=10)
+        waiters = [asyncio.ensure_future(throttle.wait_rate()) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        active = throttle.active
+        throttle.set_rate(0)
+        await asyncio.gather(*waiters)
+        return active
+
+    assert run(main()) == 0
+
+
+def test_rate():
+    async def main():
+        loop = asyncio.get_event_loop()
+        throttle = Throttle(100, rate=20)
+        start = loop.time()
+        await asyncio.gather(*[throttle.wait_rate() for _ in range(5)])
+        return loop.time() - start
+
+    # 第一个立即放行，其余每 0.05 秒一个
+    assert run(main()) >= 0.19
+
+
+def test_rate_must_be_finite():
+    for raw in ('nan', 'inf', '-1'):
+        with pytest.raises(ValueError):
+            Option.parse_rate(raw)
+    assert Option.parse_rate('2.5') == 2.5